@@ -0,0 +1,68 @@
+"""
+Cache Helper Functions
+
+Redis helper functions for short-lived response caching.
+Caching is optional: when REDIS_URL is not set, `cache` is None and callers
+should fall back to computing results directly.
+"""
+
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+# Load environment variables from .env file
+load_dotenv()
+
+cache = None
+
+redis_url = os.getenv("REDIS_URL")
+
+if redis_url:
+    # Fail fast so a slow or unreachable Redis degrades to uncached responses
+    cache = Redis.from_url(redis_url, socket_connect_timeout=0.25, socket_timeout=0.25)
+
+async def close_cache():
+    """Close the shared Redis client and its connection pool"""
+    if cache is not None:
+        await cache.aclose()
+
+
+# Short TTL for availability-derived responses
+SLOTS_TTL_SECONDS = 60
+
+
+def slots_key(service_id: str, day: str, days: int) -> str:
+    """Cache key for a service's slot grid starting on `day` and spanning `days` days"""
+    return f"slots:{service_id}:{day}:{days}"
+
+
+async def get_bytes(key: str) -> Optional[bytes]:
+    """Get a cached pre-serialized value, or None on miss/unavailable cache"""
+    if cache is None:
+        return None
+    try:
+        return await cache.get(key)
+    except RedisError:
+        return None
+
+
+async def set_bytes(key: str, value: bytes, ttl: int) -> None:
+    """Store a pre-serialized value with an expiry"""
+    if cache is None:
+        return
+    try:
+        await cache.setex(key, ttl, value)
+    except RedisError:
+        pass
+
+
+async def delete_keys(*keys: str) -> None:
+    """Delete keys in a single round-trip"""
+    if cache is None or not keys:
+        return
+    try:
+        await cache.delete(*keys)
+    except RedisError:
+        pass
@@ -0,0 +1 @@
+# Keeps the repository root importable (main, database, cache, schemas) when running pytest.
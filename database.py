@@ -5,9 +5,11 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from datetime import datetime, timezone
 import os
+import logging
 from dotenv import load_dotenv
 from typing import Union
 from pydantic import BaseModel
@@ -15,6 +17,8 @@ from pydantic import BaseModel
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 _client = None
 db = None
 
@@ -22,11 +26,25 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # One pooled client per process, shared by all requests
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", 50)),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", 10)),
+        serverSelectionTimeoutMS=2000,
+        waitQueueTimeoutMS=1000,
+        compressors="zstd,zlib",
+    )
     db = _client[database_name]
 
+
+def close_client():
+    """Close the shared MongoDB client and its connection pool"""
+    if _client is not None:
+        _client.close()
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,10 +58,26 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def upsert_document(collection_name: str, filter_dict: dict, data: dict):
+    """Insert a document with timestamps unless one matching filter_dict already exists"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    try:
+        await db[collection_name].update_one(
+            filter_dict,
+            {"$setOnInsert": {**data, "created_at": now, "updated_at": now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # A concurrent upsert inserted it first
+        pass
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +86,44 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=None)
+
+async def _create_unique_index(collection_name: str, keys: list, level: int = logging.WARNING, **kwargs):
+    """Create a unique index, logging instead of failing startup if it cannot be built"""
+    try:
+        await db[collection_name].create_index(keys, unique=True, **kwargs)
+    except OperationFailure as e:
+        logger.log(level, "Could not create unique index %s on %s: %s", kwargs.get("name", keys), collection_name, e)
+
+async def ensure_indexes():
+    """Create indexes used by the slot and booking queries"""
+    if db is None:
+        return
+
+    await db["booking"].create_index([("service_id", 1), ("date", 1)])
+    # One active booking per service slot start; backs the overlap check in create_booking
+    # $in in a partial filter needs MongoDB 6.0+. Without this index the same-start
+    # double-booking race is unguarded, so a failed build is logged as an error.
+    await _create_unique_index(
+        "booking",
+        [("service_id", 1), ("date", 1), ("start_time", 1)],
+        level=logging.ERROR,
+        name="booking_slot_unique",
+        partialFilterExpression={"status": {"$in": ["pending", "confirmed"]}},
+    )
+    await db["booking"].create_index([("service_id", 1), ("created_at", -1)])
+    await db["booking"].create_index([("created_at", -1)])
+    await db["availability"].create_index([("service_id", 1), ("weekday", 1), ("date", 1)])
+    # Keep startup seeding idempotent across concurrently starting workers
+    await _create_unique_index(
+        "service",
+        [("slug", 1)],
+        name="service_slug_unique",
+        partialFilterExpression={"slug": {"$type": "string"}},
+    )
+    await _create_unique_index(
+        "availability",
+        [("service_id", 1), ("weekday", 1), ("start_time", 1)],
+        name="availability_seed_unique",
+        partialFilterExpression={"seed": True},
+    )
@@ -1,23 +1,103 @@
 import os
-from fastapi import FastAPI, HTTPException
+import asyncio
+import gzip
+import hashlib
+import time
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
 from bson import ObjectId
+from cachetools import TTLCache
+from pymongo.errors import DuplicateKeyError
 
-from database import db, create_document, get_documents
+from database import db, create_document, upsert_document, get_documents, ensure_indexes, close_client
+from cache import SLOTS_TTL_SECONDS, slots_key, get_bytes, set_bytes, delete_keys, close_cache
 from schemas import Service, Availability, Booking
 
-app = FastAPI(title="Appointments API")
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSON response that also serializes Mongo ObjectIds"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q-values and *"""
+    qvalues = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
+class NegotiatingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that honours Accept-Encoding q-values (gzip;q=0) and *"""
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and accepts_gzip(Headers(scope=scope).get("accept-encoding", "")):
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# Service documents rarely change; keep them in-process for a few minutes
+SERVICE_CACHE = TTLCache(maxsize=1024, ttl=300)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if db is not None:
+        # Open the connection pool before the first request arrives
+        await db.command("ping")
+        await ensure_indexes()
+        await seed_data()
+        async for s in db["service"].find():
+            SERVICE_CACHE[str(s["_id"])] = s
+    yield
+    close_client()
+    await close_cache()
+
+
+app = FastAPI(title="Appointments API", default_response_class=MongoJSONResponse, lifespan=lifespan)
+
+# Comma-separated list of allowed origins; credentials are only allowed with an explicit list
+allowed_origins = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=allowed_origins or ["*"],
+    allow_credentials=bool(allowed_origins),
+    allow_methods=["GET", "POST"],
+    allow_headers=["content-type"],
 )
+app.add_middleware(NegotiatingGZipMiddleware, minimum_size=512)
 
 
 @app.get("/")
@@ -25,13 +105,36 @@ def read_root():
     return {"message": "Appointments API running"}
 
 
+# Schemas only change with the code, so serialize them once per process
+SCHEMA_JSON = orjson.dumps({
+    "service": Service.model_json_schema(),
+    "availability": Availability.model_json_schema(),
+    "booking": Booking.model_json_schema(),
+})
+SCHEMA_GZIP = gzip.compress(SCHEMA_JSON)
+SCHEMA_ETAG = f'"{hashlib.md5(SCHEMA_JSON).hexdigest()}"'
+SCHEMA_GZIP_ETAG = SCHEMA_ETAG[:-1] + '-gz"'
+SCHEMA_HEADERS = {"Cache-Control": "public, max-age=86400", "Vary": "Accept-Encoding"}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (list, W/ tags or *) against an ETag"""
+    tags = [t.strip() for t in if_none_match.split(",") if t.strip()]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
 @app.get("/schema")
-def get_schema_index():
-    return {
-        "service": Service.model_json_schema(),
-        "availability": Availability.model_json_schema(),
-        "booking": Booking.model_json_schema(),
-    }
+def get_schema_index(request: Request):
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if accepts_gzip(accept_encoding):
+        # already compressed; GZipMiddleware skips responses with Content-Encoding set
+        body, headers = SCHEMA_GZIP, {**SCHEMA_HEADERS, "ETag": SCHEMA_GZIP_ETAG, "Content-Encoding": "gzip"}
+    else:
+        body, headers = SCHEMA_JSON, {**SCHEMA_HEADERS, "ETag": SCHEMA_ETAG}
+
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers={**SCHEMA_HEADERS, "ETag": headers["ETag"]})
+    return Response(body, media_type="application/json", headers=headers)
 
 
 # Utilities
@@ -43,17 +146,57 @@ def to_object_id(id_str: str) -> ObjectId:
         raise HTTPException(status_code=400, detail="Invalid id")
 
 
-def parse_time(hhmm: str) -> datetime:
-    return datetime.strptime(hhmm, "%H:%M")
+def to_mongo(b: Booking) -> dict:
+    return {
+        "service_id": b.service_id,
+        "customer_name": b.customer_name,
+        "email": b.email,
+        "date": b.date,
+        "start_time": b.start_time,
+        "end_time": b.end_time,
+        "notes": b.notes,
+        "status": b.status,
+    }
+
 
+async def get_service(service_id: str):
+    # single lookup: a TTL entry can expire between a membership test and a get
+    doc = SERVICE_CACHE.get(service_id)
+    if doc is not None:
+        return doc
+    doc = await db["service"].find_one({"_id": to_object_id(service_id)})
+    if doc:
+        SERVICE_CACHE[service_id] = doc
+    return doc
 
-# Seed minimal data if empty
-@app.on_event("startup")
-def seed_data():
-    if db is None:
-        return
-    if db["service"].count_documents({}) == 0:
-        create_document("service", {
+
+_today_cache = (0, None)
+
+
+def today_utc() -> date:
+    """Current UTC date, recomputed at most once per minute"""
+    global _today_cache
+    now = time.time()
+    minute = int(now // 60)
+    if minute != _today_cache[0]:
+        _today_cache = (minute, datetime.fromtimestamp(now, timezone.utc).date())
+    return _today_cache[1]
+
+
+def to_minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def format_minutes(minutes: int) -> str:
+    hh, mm = divmod(minutes, 60)
+    return f"{hh:02d}:{mm:02d}"
+
+
+# Seed minimal data if empty. Every worker runs this at startup, so inserts are
+# upserts backed by unique indexes and concurrent workers converge on one copy.
+async def seed_data():
+    if await db["service"].count_documents({}) == 0:
+        await upsert_document("service", {"slug": "consultation-call"}, {
             "name": "Consultation Call",
             "description": "30-min strategy session",
             "duration_minutes": 30,
@@ -61,14 +204,16 @@ def seed_data():
             "color": "#22c55e",
             "slug": "consultation-call",
         })
-    if db["availability"].count_documents({}) == 0:
+    if await db["availability"].count_documents({}) == 0:
         # Weekday availability Mon-Fri 09:00-17:00 UTC
-        service = db["service"].find_one({})
+        service = await db["service"].find_one({"slug": "consultation-call"}) or await db["service"].find_one({}, sort=[("_id", 1)])
         for weekday in range(0,5):
-            create_document("availability", {
+            await upsert_document("availability", {
                 "service_id": str(service["_id"]),
                 "weekday": weekday,
                 "start_time": "09:00",
+                "seed": True,
+            }, {
                 "end_time": "17:00",
                 "timezone": "UTC",
             })
@@ -76,82 +221,108 @@ def seed_data():
 
 # Services
 @app.get("/api/services")
-def list_services():
-    services = get_documents("service")
-    for s in services:
-        s["_id"] = str(s["_id"])
-    return services
+async def list_services():
+    services = await get_documents("service")
+    return MongoJSONResponse(services)
 
 
 # Availability
+# Response shape for OpenAPI docs only; slots are emitted as plain dicts
 class FreeSlot(BaseModel):
     date: str
     start_time: str
     end_time: str
 
 
-@app.get("/api/services/{service_id}/slots", response_model=List[FreeSlot])
-def get_free_slots(service_id: str, days: int = 14):
-    if db is None:
-        raise HTTPException(500, "Database not configured")
-
-    service = db["service"].find_one({"_id": to_object_id(service_id)})
-    if not service:
-        raise HTTPException(404, "Service not found")
+# Longest slot window a client may request
+MAX_DAYS = 90
+# Most slots returned by a single request
+MAX_SLOTS = 200
 
-    # Collect rule-based availability
-    rules = list(db["availability"].find({"service_id": service_id}))
 
-    # Collect existing bookings
-    bookings = list(db["booking"].find({"service_id": service_id}))
+async def compute_free_slots(service_id: str, today: date, days: int, dur: int) -> List[dict]:
+    # Collect rule-based availability and bookings within the window concurrently
+    window = {"$gte": today.isoformat(), "$lt": (today + timedelta(days=days)).isoformat()}
+    rules, bookings = await asyncio.gather(
+        db["availability"].find({"service_id": service_id}).to_list(length=None),
+        db["booking"].find(
+            {"service_id": service_id, "date": window},
+            {"_id": 0, "date": 1, "start_time": 1, "end_time": 1},
+        ).to_list(length=None),
+    )
 
-    # Build a set of booked date+time ranges
+    # Build booked date -> [(start_min, end_min)] ranges
     booked = {}
     for b in bookings:
         key = b["date"]
-        booked.setdefault(key, []).append((b["start_time"], b["end_time"]))
+        booked.setdefault(key, []).append((to_minutes(b["start_time"]), to_minutes(b["end_time"])))
+    for ranges in booked.values():
+        ranges.sort()
 
-    out: List[FreeSlot] = []
-    today = datetime.utcnow().date()
+    out: List[dict] = []
     for i in range(days):
         day = today + timedelta(days=i)
         day_str = day.isoformat()
         weekday = day.weekday()
         # get matching rules (weekday or specific date)
         day_rules = [r for r in rules if (r.get("weekday") == weekday) or (r.get("date") == day_str)]
+        day_booked = booked.get(day_str, [])
         for r in day_rules:
-            start = parse_time(r["start_time"]).time()
-            end = parse_time(r["end_time"]).time()
-            # service duration
-            dur = timedelta(minutes=int(service.get("duration_minutes", 30)))
-            cursor = datetime.combine(day, start)
-            end_dt = datetime.combine(day, end)
-
-            while cursor + dur <= end_dt:
-                slot_start = cursor.strftime("%H:%M")
-                slot_end = (cursor + dur).strftime("%H:%M")
-                # skip if overlaps a booking
-                overlaps = any(not (slot_end <= b_start or slot_start >= b_end) for (b_start, b_end) in booked.get(day_str, []))
+            start = to_minutes(r["start_time"])
+            end = to_minutes(r["end_time"])
+            idx = 0
+
+            for cur in range(start, end - dur + 1, dur):
+                # sweep past bookings that end before this slot, then only the head can overlap
+                while idx < len(day_booked) and day_booked[idx][1] <= cur:
+                    idx += 1
+                overlaps = idx < len(day_booked) and day_booked[idx][0] < cur + dur
                 if not overlaps:
-                    out.append(FreeSlot(date=day_str, start_time=slot_start, end_time=slot_end))
-                cursor += dur
+                    out.append({"date": day_str, "start_time": format_minutes(cur), "end_time": format_minutes(cur + dur)})
+                    if len(out) >= MAX_SLOTS:
+                        return out
 
-    return out[:200]
+    return out
+
+
+@app.get("/api/services/{service_id}/slots", response_model=None, responses={200: {"model": List[FreeSlot]}})
+async def get_free_slots(service_id: str, days: int = Query(14, ge=1, le=MAX_DAYS)):
+    if db is None:
+        raise HTTPException(500, "Database not configured")
+
+    service = await get_service(service_id)
+    if not service:
+        raise HTTPException(404, "Service not found")
+
+    today = today_utc()
+    cache_key = slots_key(service_id, today.isoformat(), days)
+    cached = await get_bytes(cache_key)
+    if cached is not None:
+        return Response(cached, media_type="application/json")
+
+    # service duration
+    dur = int(service.get("duration_minutes", 30))
+
+    out = await compute_free_slots(service_id, today, days, dur)
+
+    body = orjson.dumps(out)
+    await set_bytes(cache_key, body, SLOTS_TTL_SECONDS)
+    return Response(body, media_type="application/json")
 
 
 # Bookings
 @app.post("/api/bookings")
-def create_booking(payload: Booking):
+async def create_booking(payload: Booking):
     if db is None:
         raise HTTPException(500, "Database not configured")
 
     # validate service exists
-    service = db["service"].find_one({"_id": to_object_id(payload.service_id)})
+    service = await get_service(payload.service_id)
     if not service:
         raise HTTPException(404, "Service not found")
 
     # prevent double-booking
-    conflict = db["booking"].find_one({
+    conflict = await db["booking"].find_one({
         "service_id": payload.service_id,
         "date": payload.date,
         "$or": [
@@ -161,25 +332,35 @@ def create_booking(payload: Booking):
     if conflict:
         raise HTTPException(409, "Time slot already booked")
 
-    data = payload.model_dump()
+    data = to_mongo(payload)
     data["service_name"] = service.get("name")
-    inserted_id = create_document("booking", data)
+    # booking_slot_unique closes the race between the check above and this insert for same-start slots
+    try:
+        inserted_id = await create_document("booking", data)
+    except DuplicateKeyError:
+        raise HTTPException(409, "Time slot already booked")
+    # drop every cached window for today so the new booking shows up immediately
+    today = today_utc().isoformat()
+    await delete_keys(*(slots_key(payload.service_id, today, d) for d in range(1, MAX_DAYS + 1)))
     return {"id": inserted_id, "status": "ok"}
 
 
-@app.get("/api/bookings")
-def list_bookings(service_id: Optional[str] = None):
+@app.get("/api/bookings", response_model=None)
+async def list_bookings(
+    service_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
     if db is None:
         raise HTTPException(500, "Database not configured")
     q = {"service_id": service_id} if service_id else {}
-    docs = list(db["booking"].find(q).sort("created_at", -1))
-    for d in docs:
-        d["_id"] = str(d["_id"])
-    return docs
+    cursor = db["booking"].find(q, {"email": 0, "notes": 0}).sort("created_at", -1).skip(offset).limit(limit)
+    docs = await cursor.to_list(length=limit)
+    return MongoJSONResponse(docs)
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available" if db is None else "✅ Connected & Working",
@@ -189,7 +370,7 @@ def test_database():
     }
     try:
         if db is not None:
-            response["collections"] = db.list_collection_names()[:10]
+            response["collections"] = (await db.list_collection_names())[:10]
     except Exception as e:
         response["database"] = f"⚠️ Connected but Error: {str(e)[:80]}"
     return response
@@ -198,4 +379,6 @@ def test_database():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Each worker is a separate process with its own Mongo pool (MONGO_MAX_POOL_SIZE connections)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="uvloop", http="httptools")
@@ -11,8 +11,11 @@ Model name is converted to lowercase for the collection name:
 - BlogPost -> "blogs" collection
 """
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, Literal
+from pydantic import BaseModel, Field, EmailStr, StringConstraints
+from typing import Optional, Literal, Annotated
+
+# 24h HH:MM time, e.g. "09:30"
+TimeStr = Annotated[str, StringConstraints(pattern=r"^([01]\d|2[0-3]):[0-5]\d$")]
 
 # Example schemas (you can keep these for reference)
 class User(BaseModel):
@@ -52,8 +55,8 @@ class Availability(BaseModel):
     consultant: Optional[str] = Field("You", description="Consultant name")
     weekday: Optional[int] = Field(None, ge=0, le=6, description="0=Mon ... 6=Sun. Use weekday OR date")
     date: Optional[str] = Field(None, description="YYYY-MM-DD. Use weekday OR date")
-    start_time: str = Field(..., pattern=r"^\d{2}:\d{2}$", description="HH:MM 24h")
-    end_time: str = Field(..., pattern=r"^\d{2}:\d{2}$", description="HH:MM 24h")
+    start_time: TimeStr = Field(..., description="HH:MM 24h")
+    end_time: TimeStr = Field(..., description="HH:MM 24h")
     timezone: Optional[str] = Field("UTC", description="IANA timezone name")
 
 class Booking(BaseModel):
@@ -66,7 +69,7 @@ class Booking(BaseModel):
     customer_name: str
     email: EmailStr
     date: str = Field(..., description="YYYY-MM-DD")
-    start_time: str = Field(..., pattern=r"^\d{2}:\d{2}$")
-    end_time: str = Field(..., pattern=r"^\d{2}:\d{2}$")
+    start_time: TimeStr
+    end_time: TimeStr
     notes: Optional[str] = None
     status: Literal["pending","confirmed","cancelled"] = "confirmed"
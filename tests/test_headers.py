@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", False),
+    ("gzip", True),
+    ("GZIP", True),
+    ("gzip, deflate, br", True),
+    ("br, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0", False),
+    ("gzip;q=bogus", False),
+    ("identity", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("br, *;q=0.1", True),
+])
+def test_accepts_gzip(header, expected):
+    assert main.accepts_gzip(header) is expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ('"x",W/"abc"', True),
+    ("*", True),
+    ('"x"', False),
+    ('"abc-gz"', False),
+])
+def test_etag_matches(header, expected):
+    assert main.etag_matches(header, '"abc"') is expected
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_schema_serves_precompressed_variant(client):
+    r = client.get("/schema", headers={"accept-encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["etag"] == main.SCHEMA_GZIP_ETAG
+    assert r.content == main.SCHEMA_JSON
+
+
+def test_schema_respects_refused_gzip(client):
+    r = client.get("/schema", headers={"accept-encoding": "gzip;q=0"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"] == main.SCHEMA_ETAG
+    assert r.content == main.SCHEMA_JSON
+
+
+@pytest.mark.parametrize("accept_encoding, etag", [
+    ("gzip", main.SCHEMA_GZIP_ETAG),
+    ("identity", main.SCHEMA_ETAG),
+])
+def test_schema_not_modified(client, accept_encoding, etag):
+    r = client.get("/schema", headers={"accept-encoding": accept_encoding, "if-none-match": f"W/{etag}"})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+
+
+def test_schema_etag_is_per_variant(client):
+    r = client.get("/schema", headers={"accept-encoding": "identity", "if-none-match": main.SCHEMA_GZIP_ETAG})
+    assert r.status_code == 200
+
+
+def test_middleware_honours_q_values():
+    app = main.NegotiatingGZipMiddleware(main.Response(b"x" * 1024), minimum_size=512)
+    client = TestClient(app)
+    r = client.get("/", headers={"accept-encoding": "gzip;q=0"})
+    assert "content-encoding" not in r.headers
+    r = client.get("/", headers={"accept-encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
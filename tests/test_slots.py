@@ -0,0 +1,103 @@
+import asyncio
+import random
+from datetime import date, timedelta
+
+import main
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        def matches(doc):
+            for field, cond in query.items():
+                value = doc.get(field)
+                if isinstance(cond, dict):
+                    if "$gte" in cond and not value >= cond["$gte"]:
+                        return False
+                    if "$lt" in cond and not value < cond["$lt"]:
+                        return False
+                elif value != cond:
+                    return False
+            return True
+        return FakeCursor([d for d in self.docs if matches(d)])
+
+
+class FakeDB(dict):
+    def __getitem__(self, name):
+        return self.get(name) or FakeCollection([])
+
+
+def brute_force_slots(rules, bookings, today, days, dur):
+    out = []
+    for i in range(days):
+        day = today + timedelta(days=i)
+        day_str = day.isoformat()
+        day_bookings = [
+            (main.to_minutes(b["start_time"]), main.to_minutes(b["end_time"]))
+            for b in bookings if b["date"] == day_str
+        ]
+        for r in rules:
+            if r.get("weekday") != day.weekday() and r.get("date") != day_str:
+                continue
+            start, end = main.to_minutes(r["start_time"]), main.to_minutes(r["end_time"])
+            for cur in range(start, end - dur + 1, dur):
+                if not any(cur < b_end and cur + dur > b_start for b_start, b_end in day_bookings):
+                    out.append({"date": day_str, "start_time": main.format_minutes(cur), "end_time": main.format_minutes(cur + dur)})
+    return out[:main.MAX_SLOTS]
+
+
+def random_time(rng, lo, hi):
+    return main.format_minutes(rng.randrange(lo, hi))
+
+
+def test_sweep_matches_brute_force(monkeypatch):
+    rng = random.Random(1234)
+    today = date(2026, 10, 12)
+    for _ in range(500):
+        days = rng.randint(1, 10)
+        dur = rng.choice([15, 20, 30, 45, 60])
+        rules = []
+        for _ in range(rng.randint(1, 4)):
+            start = rng.randrange(0, 20 * 60)
+            rule = {
+                "service_id": "svc",
+                "start_time": main.format_minutes(start),
+                "end_time": main.format_minutes(min(start + rng.randrange(0, 10 * 60), 24 * 60 - 1)),
+            }
+            if rng.random() < 0.7:
+                rule["weekday"] = rng.randrange(7)
+            else:
+                rule["date"] = (today + timedelta(days=rng.randrange(days))).isoformat()
+            rules.append(rule)
+        bookings = []
+        for _ in range(rng.randint(0, 30)):
+            start = rng.randrange(0, 23 * 60)
+            bookings.append({
+                "service_id": "svc",
+                "date": (today + timedelta(days=rng.randrange(days + 2))).isoformat(),
+                "start_time": main.format_minutes(start),
+                "end_time": main.format_minutes(min(start + rng.randrange(1, 180), 24 * 60 - 1)),
+            })
+
+        monkeypatch.setattr(main, "db", FakeDB(availability=FakeCollection(rules), booking=FakeCollection(bookings)))
+        got = asyncio.run(main.compute_free_slots("svc", today, days, dur))
+        assert got == brute_force_slots(rules, bookings, today, days, dur)
+
+
+def test_slots_stop_at_cap(monkeypatch):
+    rules = [{"service_id": "svc", "weekday": wd, "start_time": "00:00", "end_time": "23:45"} for wd in range(7)]
+    monkeypatch.setattr(main, "db", FakeDB(availability=FakeCollection(rules), booking=FakeCollection([])))
+    got = asyncio.run(main.compute_free_slots("svc", date(2026, 10, 12), 14, 15))
+    assert len(got) == main.MAX_SLOTS
+    # 95 slots per day, so the cap is hit on the tenth slot of the third day
+    assert got[-1] == {"date": "2026-10-14", "start_time": "02:15", "end_time": "02:30"}